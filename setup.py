@@ -27,6 +27,7 @@ setup(
     url="https://github.com/1ucky40nc3/prollm-translator",
     package_dir={"": "src"},
     packages=find_packages("src"),
+    package_data={"prollm_translator.prompts": ["*.txt"]},
     entry_points={
         "console_scripts": [
             "gradio-chat=gradio_chat.app:main",
@@ -12,45 +12,62 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Generator
+from typing import AsyncGenerator
+from collections import OrderedDict
 
 import os
+import time
+import asyncio
 import logging
 import argparse
 
 import gradio as gr
 
-from gradio_chat.models import ChatHistory, Update
+from gradio_chat.models import Chat, ChatHistory, Update
 from gradio_chat.utils import (
-    timestamp,
+    dir_index,
     load_frontend_from_cache,
-    load_chats_from_cache,
+    import_legacy_chats,
     load_settings,
     pprint_dcls,
     pprint_dict,
-    list_chat_ids,
     find_chat_by_id,
+    cache_chat,
     set_chat_by_id,
+    mark_chat_dirty,
     update_chat_by_id,
     del_chat_by_id,
     empty_chat,
-    list_setting_ids,
-    find_setting_by_id
+    list_setting_ids
 )
 from gradio_chat.parser import argument_parser
+from gradio_chat.storage import SQLiteChatStorage
+from gradio_chat.response_cache import ResponseCache, response_key
 
-from prollm_translator.llm import openai_chat_completion
+from prollm_translator.utils import timestamp, LazyStr
+from prollm_translator.llm import openai_chat_completion_async
 from prollm_translator.prompts import base
 
 
 logger = logging.getLogger(__name__)
 
 
-# We work with global variables here.
-# TODO: Use states instead of global variables
-chats = None
-settings = None
+# The chat storage and the response cache are shared between all sessions.
+# Each session caches its chats in its own state.
+storage = None
+response_cache = ResponseCache()
 
+# The system prompt is static - so we only build it once
+SYSTEM_PROMPT = base.prompt(
+    source_lang_short="en",
+    target_lang_short="ja",
+    google_translation="同意します"
+)
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+# Coalesce streamed tokens - flush after a number of tokens or an interval (in seconds)
+STREAM_FLUSH_TOKENS = 4
+STREAM_FLUSH_INTERVAL = 0.04
 
 
 def user_fn(user_message: str, history: ChatHistory, setting_id: str) -> tuple[str, ChatHistory, str]:
@@ -64,99 +81,209 @@ def user_fn(user_message: str, history: ChatHistory, setting_id: str) -> tuple[s
     Returns:
         A tuple of the new user message value, the chat history and the current setting ID.
     """
-    history += [(user_message, None)]
+    history += [[user_message, None]]
     return "", history, setting_id
 
 
-def bot_fn(history: ChatHistory, setting_id: str) -> Generator[ChatHistory, None, None]:
+async def bot_fn(
+    history: ChatHistory,
+    chat_id: str,
+    setting_id: str,
+    chats: OrderedDict[str, Chat]
+) -> AsyncGenerator[ChatHistory, None]:
     """A bot function with output streaming.
 
+    Note:
+        Responses to known messages are served from the response cache.
+        The finished chat turn is appended to the chat storage.
+        The cached chat is marked as dirty in place.
+
     Args:
         history: The current chat history.
+        chat_id: The current chat ID.
         setting_id: The current setting ID.
+        chats: The cached chats of the session.
 
     Returns:
-        A generator that yields the current chat history delta.
+        An async generator that yields the current chat history delta.
     """
-    source_lang_short = "en"
-    target_lang_short = "ja"
-    google_translation = "同意します"
-    system_prompt = base.prompt(
-        source_lang_short=source_lang_short,
-        target_lang_short=target_lang_short,
-        google_translation=google_translation
+    mark_chat_dirty(chat_id, chats)
+    message = history[-1][0]
+    key = response_key(SYSTEM_PROMPT, message)
+    response = response_cache.get(key)
+    if response is not None:
+        # Skip the chat completion for known translations
+        history[-1][1] = response
+        yield history
+    else:
+        messages = [
+            SYSTEM_MESSAGE,
+            {"role": "user", "content": message}
+        ]
+
+        completion_iter = openai_chat_completion_async(messages)
+
+        history[-1][1] = ""
+        # Collect the tokens and join them on flush instead of growing the message
+        parts = []
+        pending = 0
+        last_flush = time.monotonic()
+        async for output in completion_iter:
+            # Chunks without content (e.g. the role and finish chunks) don't change
+            # the chat history - so we don't send the full history to the frontend
+            if not output:
+                continue
+            parts.append(output)
+            pending += 1
+            now = time.monotonic()
+            if pending >= STREAM_FLUSH_TOKENS or now - last_flush > STREAM_FLUSH_INTERVAL:
+                history[-1][1] = "".join(parts)
+                pending = 0
+                last_flush = now
+                yield history
+
+        # Flush the remaining tokens
+        if pending:
+            history[-1][1] = "".join(parts)
+            yield history
+
+        if history[-1][1]:
+            response_cache.put(key, history[-1][1])
+
+    await asyncio.to_thread(
+        storage.append_messages,
+        chat_id,
+        [("user", message), ("assistant", history[-1][1])]
     )
 
-    message = history[-1][0]
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": message}
-    ]
 
-    completion_iter = openai_chat_completion(messages)
+def load_session_event(
+    chat_id: str,
+    chats: OrderedDict[str, Chat]
+) -> tuple[str, ChatHistory, Update, Update, OrderedDict[str, Chat]]:
+    """Load the current chat of a new session from the chat storage.
 
-    history[-1][1] = ""
-    for output in completion_iter:
-        if output is not None:
-            history[-1][1] += output
-        yield history
+    Note:
+        The layout is built once at startup. We therefore load the chats and
+        the chat history of every new session - so they aren't stale.
+        We fall back to the first chat if the chat was deleted in the meantime.
+
+    Args:
+        chat_id: The initial chat ID.
+        chats: The cached chats of the session.
 
+    Returns:
+        A tuple with updates for the chat ID, the chatbot chat history,
+        the chat selection, the chat renaming textbox and the cached chats.
+    """
+    choices = storage.list_chat_ids()
+    if not choices:
+        logger.info("Creating empty chat because there are no chats")
+        chat = empty_chat()
+        storage.add_chat(chat)
+        choices = [chat.id]
+    if chat_id not in choices:
+        chat_id = choices[0]
+    chat = find_chat_by_id(chat_id, chats, storage)
+    return (
+        chat.id,
+        chat.history,
+        gr.update(choices=choices, value=chat.id),
+        gr.update(value=chat.id),
+        chats
+    )
 
-def select_chat_event(choice: str, chat_id: str, chat_history: ChatHistory) -> tuple[str, Update, Update]:
+
+def select_chat_event(
+    choice: str,
+    chat_id: str,
+    chat_history: ChatHistory,
+    chats: OrderedDict[str, Chat]
+) -> tuple[str, Update, Update, OrderedDict[str, Chat]]:
     """Change the selected chat.
 
     Args:
         choice: The ID of the chat we want to select.
         chat_id: The current chat ID.
         chat_history: The current chat history.
+        chats: The cached chats of the session.
 
     Returns:
-        A tuple with updates for the chat ID, the chatbot chat history and the chat renaming textbox.
+        A tuple with updates for the chat ID, the chatbot chat history, 
+        the chat renaming textbox and the cached chats.
     """
     set_chat_by_id(chat_id, chat_history, chats)
-    chat = find_chat_by_id(choice, chats)
-    return chat.id, gr.update(value=chat.history), gr.update(value=chat.id)
+    chat = find_chat_by_id(choice, chats, storage)
+    return chat.id, gr.update(value=chat.history), gr.update(value=chat.id), chats
 
 
-def add_chat_event(chat_id: str, chat_history: ChatHistory) -> tuple[str, ChatHistory, Update]:
+def add_chat_event(
+    chat_id: str,
+    chat_history: ChatHistory,
+    chats: OrderedDict[str, Chat]
+) -> tuple[str, ChatHistory, Update, OrderedDict[str, Chat]]:
     """Add a new chat.
     
     Args:
         chat_id: The ID of the current chat.
         chat_history: The current chat history.
+        chats: The cached chats of the session.
 
     Returns:
-        A tuple with updates for the chat ID, the chatbot chat history and the chat selection.
+        A tuple with updates for the chat ID, the chatbot chat history, 
+        the chat selection and the cached chats.
     """
     set_chat_by_id(chat_id, chat_history, chats)
     chat = empty_chat()
-    chats.append(chat)
-    choices = list_chat_ids(chats)
-    return chat.id, chat.history, gr.update(choices=choices, value=chat.id)
+    cache_chat(chat, chats)
+    storage.add_chat(chat)
+    choices = storage.list_chat_ids()
+    return chat.id, chat.history, gr.update(choices=choices, value=chat.id), chats
 
 
-def delete_chat_event(chat_id: str) -> tuple[str, ChatHistory, Update]:
+def delete_chat_event(
+    chat_id: str,
+    chats: OrderedDict[str, Chat]
+) -> tuple[str, ChatHistory, Update, OrderedDict[str, Chat]]:
     """Delete a chat.
     
     Args:
         chat_id: The ID of the chat we want to delete.
+        chats: The cached chats of the session.
 
     Returns:
-        A tuple with updates for the chat ID, the chatbot chat history and the chat selection.
+        A tuple with updates for the chat ID, the chatbot chat history, 
+        the chat selection and the cached chats.
     """
     del_chat_by_id(chat_id, chats)
-    if len(chats) == 0:
+    storage.del_chat(chat_id)
+    choices = storage.list_chat_ids()
+    if not choices:
         logger.info("Creating empty chat because we deleted all chats")
         chat = empty_chat()
-        chats.append(chat)
-    chat = chats[0]
-    choices = list_chat_ids(chats)
-    return chat.id, chat.history, gr.update(choices=choices, value=chat.id)
-
+        cache_chat(chat, chats)
+        storage.add_chat(chat)
+        choices = [chat.id]
+    chat = find_chat_by_id(choices[0], chats, storage)
+    return chat.id, chat.history, gr.update(choices=choices, value=chat.id), chats
+
+
+def clear_chat_event(
+    chat_id: str,
+    chats: OrderedDict[str, Chat]
+) -> tuple[None, OrderedDict[str, Chat]]:
+    """Clear the current chat.
+    
+    Args:
+        chat_id: The ID of the chat we want to clear.
+        chats: The cached chats of the session.
 
-def clear_chat_event() -> None:
-    """Clear the current chat."""
-    return None
+    Returns:
+        A tuple with updates for the chatbot chat history and the cached chats.
+    """
+    storage.clear_chat(chat_id)
+    mark_chat_dirty(chat_id, chats)
+    return None, chats
 
 
 def select_setting_event(choice: str) -> str:
@@ -168,25 +295,34 @@ def select_setting_event(choice: str) -> str:
     Returns:
         An update to the setting state.
     """
-    print(f"Selected setting: {choice}")
+    logger.debug("Selected setting: %s", choice)
     return choice
 
 
-def rename_chat_event(new_id: str, chat_id: str) -> tuple[str, Update]:
+def rename_chat_event(
+    new_id: str,
+    chat_id: str,
+    chats: OrderedDict[str, Chat]
+) -> tuple[str, Update, OrderedDict[str, Chat]]:
     """Rename a chat.
     
     Args:
         new_id: The new ID of the chat.
         chat_id: The current ID of the chat.
+        chats: The cached chats of the session.
 
     Returns:
-        A tuple with updates for the chat ID state and the chat selection.
+        A tuple with updates for the chat ID state, the chat selection and the cached chats.
     """
-    chat = find_chat_by_id(chat_id, chats)
+    if new_id != chat_id and storage.has_chat(new_id):
+        logger.warning("Can't rename chat because the id is already taken: %s", new_id)
+        return chat_id, gr.update(value=chat_id), chats
+    chat = find_chat_by_id(chat_id, chats, storage)
     chat.id = new_id
     update_chat_by_id(chat_id, chat, chats)
-    choices = list_chat_ids(chats)
-    return chat.id, gr.update(choices=choices, value=chat.id)
+    storage.rename_chat(chat_id, new_id)
+    choices = storage.list_chat_ids()
+    return chat.id, gr.update(choices=choices, value=chat.id), chats
 
 
 def app(args: argparse.Namespace) -> None:
@@ -195,35 +331,38 @@ def app(args: argparse.Namespace) -> None:
     Args:
         args: Some parsed args from the argument parser.
     """
-    global chats
-    global settings
+    global storage
 
-    frontend = load_frontend_from_cache(args.frontend, args.cache_dir)
-    logger.info(f"Loaded frontend config:\n{pprint_dcls(frontend)}")
+    # Scan the cache directory once for all cached files
+    cache_index = dir_index(args.cache_dir)
+    frontend = load_frontend_from_cache(args.frontend, args.cache_dir, cache_index)
+    logger.info("Loaded frontend config:\n%s", LazyStr(pprint_dcls, frontend))
     settings = load_settings(args.settings)
-    logger.info(f"Loaded a total of {len(settings)} settings")
-    chats = load_chats_from_cache(args.cache_dir)
-    logger.info(f"Loaded a total of {len(chats)} chats")
+    logger.info("Loaded a total of %d settings", len(settings))
+    storage = SQLiteChatStorage(args.cache_dir)
+    import_legacy_chats(args.cache_dir, storage, cache_index)
+    logger.info("Loaded a total of %d chats from: %s", len(storage.list_chat_ids()), storage.path)
 
-    if len(chats) == 0:
-        chat = empty_chat("Start")
-        chats.append(chat)
+    if not storage.list_chat_ids():
+        storage.add_chat(empty_chat("Start"))
 
     chat_id = frontend.chat_id
-    if chat_id is None:
-        chat_id = chats[0].id
+    if chat_id is None or not storage.has_chat(chat_id):
+        chat_id = storage.list_chat_ids()[0]
     setting_id = frontend.setting_id
-    print(f"{chat_id=}")
+    logger.debug("Selected chat: %s", chat_id)
 
     with gr.Blocks() as demo:
         # Set the states
         chat_id_state = gr.State(chat_id)
         setting_id_state = gr.State(setting_id)
+        # Every session starts with an empty chat cache - the chats are loaded on demand
+        chats_state = gr.State(OrderedDict())
 
         # Init the layout
         with gr.Row():
             select_chat_radio = gr.Radio(
-                choices=list_chat_ids(chats),
+                choices=storage.list_chat_ids(),
                 value=chat_id,
                 label="Select chat", 
                 interactive=True
@@ -233,9 +372,8 @@ def app(args: argparse.Namespace) -> None:
                 delete_chat_button = gr.Button(value="Delete chat")
         
         with gr.Column():
-            chat = find_chat_by_id(chat_id, chats)
+            # The chat history is loaded when a session starts (see `load_session_event`)
             chatbot = gr.Chatbot(
-                value=chat.history, 
                 interactive=True, 
                 label="Chat history"
             )
@@ -256,33 +394,57 @@ def app(args: argparse.Namespace) -> None:
                 )
 
         # Set the events
+        demo.load(
+            load_session_event,
+            inputs=[
+                chat_id_state,
+                chats_state
+            ],
+            outputs=[
+                chat_id_state,
+                chatbot,
+                select_chat_radio,
+                rename_text_box,
+                chats_state
+            ]
+        )
         add_chat_button.click(
             add_chat_event, 
             inputs=[
                 chat_id_state,
                 chatbot,
+                chats_state
             ],
             outputs=[
                 chat_id_state,
                 chatbot,
-                select_chat_radio
+                select_chat_radio,
+                chats_state
             ]
         )
         delete_chat_button.click(
             delete_chat_event, 
             inputs=[
                 chat_id_state,
+                chats_state
             ],
             outputs=[
                 chat_id_state, 
                 chatbot,
-                select_chat_radio
+                select_chat_radio,
+                chats_state
             ]
         )
         clear_chat_button.click(
             clear_chat_event, 
-            inputs=None, 
-            outputs=chatbot, 
+            inputs=[
+                chat_id_state,
+                chats_state
+            ], 
+            outputs=[
+                chatbot,
+                chats_state
+            ], 
             queue=False
         )
         select_chat_radio.change(
@@ -290,12 +452,14 @@ def app(args: argparse.Namespace) -> None:
             inputs=[
                 select_chat_radio, 
                 chat_id_state, 
-                chatbot
+                chatbot,
+                chats_state
             ], 
             outputs=[
                 chat_id_state, 
                 chatbot,
-                rename_text_box
+                rename_text_box,
+                chats_state
             ]
         )
         message_text_box.submit(
@@ -313,7 +477,7 @@ def app(args: argparse.Namespace) -> None:
             queue=False
         ).then(
             bot_fn, 
-            [chatbot, setting_id_state], 
+            [chatbot, chat_id_state, setting_id_state, chats_state], 
             chatbot
         )
         select_setting_radio.change(
@@ -325,15 +489,17 @@ def app(args: argparse.Namespace) -> None:
             rename_chat_event, 
             inputs=[
                 rename_text_box, 
-                chat_id_state
+                chat_id_state,
+                chats_state
             ], 
             outputs=[
                 chat_id_state, 
-                select_chat_radio
+                select_chat_radio,
+                chats_state
             ]
         )
 
-    demo.queue()
+    demo.queue(concurrency_count=args.concurrency_count)
     demo.launch(
         share=args.share, 
         server_name=args.server_name,
@@ -361,17 +527,17 @@ def main() -> None:
     )
 
     logger = logging.getLogger(__name__)
-    logger.info(f"Writing logs to file: {logs_filename}")
+    logger.info("Writing logs to file: %s", logs_filename)
 
     # Logging config
-    logger.info(f"Starting frontend with args:\n{pprint_dict(vars(args))}")
+    logger.info("Starting frontend with args:\n%s", LazyStr(pprint_dict, vars(args)))
 
     if args.local:
         # Set up the local environment
         from dotenv import load_dotenv
         if load_dotenv(args.env_file, verbose=True):
             logger.info(
-                f"Loaded local environment variables with dotenv from: {args.env_file}"
+                "Loaded local environment variables with dotenv from: %s", args.env_file
             )
 
     app(args)
@@ -22,10 +22,10 @@ from dataclasses import dataclass
 Update = dict
 UserMessage = str
 BotMessage = str | None
-ChatHistory = list[tuple[UserMessage, BotMessage]]
+ChatHistory = list[list[UserMessage | BotMessage]]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Setting:
     """A settings object.
     
@@ -39,7 +39,7 @@ class Setting:
     data: dict[str, Any]
 
 
-@dataclass
+@dataclass(slots=True)
 class Frontend:
     """A frontend object.
 
@@ -51,13 +51,15 @@ class Frontend:
     chat_id: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class Chat:
     """A chat object.
     
     Attrs:
         id: A chat's ID (name).
         history: The chat history.
+        dirty: Whether the chat history changed in the frontend since it was set.
     """
     id: str
     history: ChatHistory
+    dirty: bool = False
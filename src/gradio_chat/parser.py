@@ -12,34 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import os
 import argparse
 
+from prollm_translator.parser import local_path
 
-def local_path(path: str) -> str | None:
-    """Typing for provided path arguments.
 
-    Args:
-        path: A local path of a file or directory.
-
-    Returns:
-        The path if it exists.
-
-    Raises:
-        ArgumentTypeError: The provided path doesn't exist.
-    """
-    if os.path.exists(path):
-        return path
-    else:
-        raise argparse.ArgumentTypeError(f"The provided '{path=}' doesn't exist!")
-    
-
-def argument_parser() -> argparse.ArgumentParser():
-    """Implement an argument parser.
-    
-    Returns:
-        An argument parser for the gradio chat app.
-    """
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the gradio chat app."""
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--frontend",
@@ -77,6 +56,12 @@ def argument_parser() -> argparse.ArgumentParser():
         type=int,
         help="The port of our local gradio server."
     )
+    parser.add_argument(
+        "--concurrency_count",
+        default=8,
+        type=int,
+        help="The number of events the gradio queue processes concurrently."
+    )
     parser.add_argument(
         "--local",
         action="store_true",
@@ -96,4 +81,17 @@ def argument_parser() -> argparse.ArgumentParser():
         help="The path to the logging directory.",
     )
 
-    return parser
\ No newline at end of file
+    return parser
+
+
+# The parser is built once and reused
+_PARSER = _build_parser()
+
+
+def argument_parser() -> argparse.ArgumentParser:
+    """Implement an argument parser.
+    
+    Returns:
+        An argument parser for the gradio chat app.
+    """
+    return _PARSER
@@ -0,0 +1,74 @@
+# Copyright 2023 Louis Wendler
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional
+
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# The maximum number of cached responses
+CACHE_MAX_SIZE = 128
+# The time (in seconds) until a cached response expires
+CACHE_TTL_SECONDS = 3600
+
+
+def response_key(system_prompt: str, message: str) -> bytes:
+    """Return the cache key of a response.
+
+    Args:
+        system_prompt: The system prompt of the chat completion.
+        message: The user message of the chat completion.
+
+    Returns:
+        A digest of the system prompt and the user message.
+    """
+    return hashlib.sha1((system_prompt + message).encode("utf-8")).digest()
+
+
+class ResponseCache:
+    """A LRU cache of chat completion responses with expiration.
+
+    Args:
+        max_size: The maximum number of cached responses.
+        ttl: The time (in seconds) until a cached response expires.
+    """
+    def __init__(self, max_size: int = CACHE_MAX_SIZE, ttl: float = CACHE_TTL_SECONDS) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._responses: OrderedDict[bytes, tuple[float, str]] = OrderedDict()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """Return a cached response or `None` if there is no valid response."""
+        with self._lock:
+            item = self._responses.get(key)
+            if item is None:
+                return None
+            expires, response = item
+            if expires < time.monotonic():
+                del self._responses[key]
+                return None
+            self._responses.move_to_end(key)
+            return response
+
+    def put(self, key: bytes, response: str) -> None:
+        """Cache a response and evict the least recently used responses."""
+        with self._lock:
+            self._responses[key] = (time.monotonic() + self.ttl, response)
+            self._responses.move_to_end(key)
+            while len(self._responses) > self.max_size:
+                self._responses.popitem(last=False)
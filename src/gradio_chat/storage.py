@@ -0,0 +1,236 @@
+# Copyright 2023 Louis Wendler
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from typing import Optional
+
+import os
+import logging
+import sqlite3
+import threading
+
+from gradio_chat.models import (
+    Chat,
+    ChatHistory
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS messages (
+    chat_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    PRIMARY KEY (chat_id, position)
+);
+"""
+
+# The maximum number of messages we load per chat
+MAX_MESSAGES = 5000
+# The name of the database file in the cache directory
+DATABASE_NAME = "chats.db"
+
+
+def history_to_messages(history: ChatHistory) -> list[tuple[str, str]]:
+    """Convert a chat history into a list of messages.
+
+    Args:
+        history: A chat history of user and bot message pairs.
+
+    Returns:
+        A list of role and content tuples. Pending bot messages are skipped.
+    """
+    messages = []
+    for user_message, bot_message in history:
+        if user_message is not None:
+            messages.append(("user", user_message))
+        if bot_message is not None:
+            messages.append(("assistant", bot_message))
+    return messages
+
+
+def messages_to_history(messages: list[tuple[str, str]]) -> ChatHistory:
+    """Convert a list of messages into a chat history.
+
+    Args:
+        messages: A list of role and content tuples.
+
+    Returns:
+        A chat history of user and bot message pairs.
+    """
+    history = []
+    for role, content in messages:
+        if role == "user" or not history or history[-1][1] is not None:
+            history.append([None, None])
+        if role == "user":
+            history[-1][0] = content
+        else:
+            history[-1][1] = content
+    return history
+
+
+class SQLiteChatStorage:
+    """A SQLite storage of chats.
+
+    Chats are stored as one row per message. This allows us to append messages
+    and to read bounded parts of a chat instead of rewriting whole chats.
+
+    Note:
+        The connection is shared between the threads of the gradio app.
+        Every access is therefore guarded by a lock.
+
+    Args:
+        path: The path to the cache directory. The database is stored as 'chats.db'.
+    """
+    def __init__(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        self.path = os.path.join(path, DATABASE_NAME)
+        self._lock = threading.Lock()
+        # The chat IDs are cached until chats are added, renamed or deleted
+        self._chat_ids: Optional[list[str]] = None
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+
+    def list_chat_ids(self) -> list[str]:
+        """Return the IDs of all chats (in the order of creation).
+
+        Note:
+            The returned list is cached and shared between calls - don't modify it.
+        """
+        with self._lock:
+            if self._chat_ids is None:
+                rows = self._connection.execute(
+                    "SELECT id FROM chats ORDER BY rowid"
+                ).fetchall()
+                self._chat_ids = [row[0] for row in rows]
+            return self._chat_ids
+
+    def has_chat(self, id: str) -> bool:
+        """Return whether a chat with the ID exists."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM chats WHERE id = ?", (id,)
+            ).fetchone()
+        return row is not None
+
+    def load_chat(self, id: str, limit: int = MAX_MESSAGES) -> Optional[Chat]:
+        """Load a chat with its latest messages.
+
+        Args:
+            id: The ID of the chat.
+            limit: The maximum number of messages we load.
+
+        Returns:
+            The loaded chat or `None` if the chat doesn't exist.
+        """
+        if not self.has_chat(id):
+            return None
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT role, content FROM ("
+                "SELECT position, role, content FROM messages "
+                "WHERE chat_id = ? ORDER BY position DESC LIMIT ?"
+                ") ORDER BY position",
+                (id, limit)
+            ).fetchall()
+        return Chat(id=id, history=messages_to_history(rows))
+
+    def add_chat(self, chat: Chat) -> None:
+        """Add a new chat and its history.
+
+        Args:
+            chat: The chat we want to add.
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO chats (id) VALUES (?)",
+                (chat.id,)
+            )
+            self._chat_ids = None
+        self.append_messages(chat.id, history_to_messages(chat.history))
+
+    def append_messages(self, id: str, messages: list[tuple[str, str]]) -> None:
+        """Append messages to a chat.
+
+        Note:
+            The messages are skipped if the chat doesn't exist (anymore).
+            A chat may be deleted while a chat turn of it is streamed.
+
+        Args:
+            id: The ID of the chat.
+            messages: A list of role and content tuples.
+        """
+        if not messages:
+            return
+        with self._lock, self._connection:
+            # Check the chat in the same transaction - so we don't orphan messages of deleted chats
+            row = self._connection.execute(
+                "SELECT 1 FROM chats WHERE id = ?", (id,)
+            ).fetchone()
+            if row is None:
+                logger.warning("Skipping messages of a chat that doesn't exist: %s", id)
+                return
+            (start,) = self._connection.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM messages WHERE chat_id = ?",
+                (id,)
+            ).fetchone()
+            self._connection.executemany(
+                "INSERT INTO messages (chat_id, position, role, content) VALUES (?, ?, ?, ?)",
+                [
+                    (id, position, role, content)
+                    for position, (role, content) in enumerate(messages, start)
+                ]
+            )
+
+    def clear_chat(self, id: str) -> None:
+        """Delete all messages of a chat.
+
+        Args:
+            id: The ID of the chat.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM messages WHERE chat_id = ?", (id,))
+
+    def rename_chat(self, id: str, new_id: str) -> None:
+        """Rename a chat.
+
+        Args:
+            id: The current ID of the chat.
+            new_id: The new ID of the chat.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE chats SET id = ? WHERE id = ?", (new_id, id))
+            self._connection.execute(
+                "UPDATE messages SET chat_id = ? WHERE chat_id = ?",
+                (new_id, id)
+            )
+            self._chat_ids = None
+
+    def del_chat(self, id: str) -> None:
+        """Delete a chat and its messages.
+
+        Args:
+            id: The ID of the chat.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM messages WHERE chat_id = ?", (id,))
+            self._connection.execute("DELETE FROM chats WHERE id = ?", (id,))
+            self._chat_ids = None
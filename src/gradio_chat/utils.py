@@ -14,18 +14,23 @@
 
 from typing import (
     Any,
+    Iterator,
     Type,
-    Optional
+    Optional,
+    TYPE_CHECKING
 )
 
 import os
-import json
-import glob
 import logging
-import datetime
-from dataclasses import dataclass, asdict
+import functools
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
-from haikunator import Haikunator
+import orjson
+
+if TYPE_CHECKING:
+    from haikunator import Haikunator
 
 from gradio_chat.models import (
     Setting, 
@@ -33,43 +38,107 @@ from gradio_chat.models import (
     Chat,
     ChatHistory
 )
+from gradio_chat.storage import SQLiteChatStorage
 
 
 logger = logging.getLogger(__name__)
 
 
-def timestamp() -> str:
-    """Return a current timestamp."""
-    return datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+# The maximum number of chats we keep in memory
+MAX_CHATS = int(os.getenv("MAX_CHATS", 256))
+
+# The number of threads we use to load settings and chats
+LOAD_WORKERS = 8
+
+# The names of the cached frontend file and the legacy chats directory
+CACHE_FRONTEND_NAME = "frontend.json"
+CACHE_CHATS_NAME = "chats"
+
+
+@functools.lru_cache(maxsize=None)
+def _haikunator() -> "Haikunator":
+    """Return a shared name generator for new chats (imported on first use)."""
+    from haikunator import Haikunator
+    return Haikunator()
 
 
 def haikunate() -> str:
     """Return a random name."""
-    return Haikunator().haikunate()
+    return _haikunator().haikunate()
 
 
 def load_json(path: str) -> dict[str, Any]:
     """Load JSON file content."""
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
 
 
-def load_setting(path: str) -> Setting:
-    """Load settings from a JSON file."""
+def scandir_json(path: str) -> Iterator[str]:
+    """Yield the paths of JSON files in a directory (recursively).
+
+    Note:
+        Like `glob` this skips hidden files and directories. Symlinks are skipped.
+
+    Args:
+        path: The path of the directory.
+
+    Returns:
+        A generator that yields the paths of the JSON files.
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or entry.is_symlink():
+                continue
+            if entry.is_file() and entry.name.endswith(".json"):
+                yield entry.path
+            elif entry.is_dir():
+                yield from scandir_json(entry.path)
+
+
+def dir_index(path: str) -> dict[str, os.DirEntry]:
+    """Index the entries of a directory by their names.
+
+    Note:
+        This lets us test for multiple files with a single directory scan.
+
+    Args:
+        path: The path of the directory.
+
+    Returns:
+        The directory entries mapped by their names.
+        The mapping is empty if the directory doesn't exist.
+    """
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name: entry for entry in entries}
+    except FileNotFoundError:
+        return {}
+
+
+@functools.lru_cache(maxsize=1024)
+def _load_setting(path: str, mtime_ns: int) -> Setting:
+    """Load settings from a JSON file (cached by path and modification time)."""
     data = load_json(path)
     data['file'] = path
     return Setting(**data)
+
+
+def load_setting(path: str) -> Setting:
+    """Load settings from a JSON file.
+
+    Note:
+        Unchanged files are only parsed once. The cached settings are shared (and frozen).
+    """
+    return _load_setting(path, os.stat(path).st_mtime_ns)
     
 
-def load_settings(path: str) -> list[Setting]:
-    """Load multiple settings in a directory."""
-    pattern = os.path.join(path, "**", "*.json")
-    paths = glob.glob(pattern, recursive=True)
-    settings = []
-    for path in paths:
-        setting = load_setting(path)
-        settings.append(setting)
-    return settings
+def load_settings(path: str) -> dict[str, Setting]:
+    """Load multiple settings in a directory (mapped by their IDs)."""
+    paths = list(scandir_json(path))
+    # Parse the files in parallel - so we overlap the disk reads of many files
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+        settings = executor.map(load_setting, paths)
+        return {setting.id: setting for setting in settings}
 
 
 def load_frontend(path: str) -> Frontend:
@@ -78,22 +147,29 @@ def load_frontend(path: str) -> Frontend:
     return Frontend(**data)
 
 
-def load_frontend_from_cache(path: str, cache: str) -> Frontend:
+def load_frontend_from_cache(
+    path: str,
+    cache: str,
+    cache_index: Optional[dict[str, os.DirEntry]] = None
+) -> Frontend:
     """Initialize a cached frontend.
     
     Args:
         path: The fallback path for a JSON frontend settings file.
         cache: The cache directory with a 'frontend.json' JSON 
             frontend settings file w/ cached data.
+        cache_index: An optional index of the cache directory (see `dir_index`).
     
     Returns:
         The initialized frontend.
     """
-    cache_path = os.path.join(cache, "frontend.json")
-    if os.path.exists(cache_path):
-        logger.info(f"Loading frontend from cache at: {cache_path}")
-        return load_frontend(cache_path)
-    logger.info(f"Loading frontend from: {path}")
+    if cache_index is None:
+        cache_index = dir_index(cache)
+    entry = cache_index.get(CACHE_FRONTEND_NAME)
+    if entry is not None and entry.is_file():
+        logger.info("Loading frontend from cache at: %s", entry.path)
+        return load_frontend(entry.path)
+    logger.info("Loading frontend from: %s", path)
     return load_frontend(path)
 
 
@@ -105,165 +181,195 @@ def load_chat(path: str) -> Chat:
 
 def load_chats(path: str) -> list[Chat]:
     """Initialize multiple chats from JSON files in a directory."""
-    pattern = os.path.join(path, "**", "*.json")
-    paths = glob.glob(pattern, recursive=True)
-    chats = []
-    for path in paths:
-        chat = load_chat(path)
-        chats.append(chat)
-    return chats
+    paths = list(scandir_json(path))
+    # Parse the files in parallel - so we overlap the disk reads of many files
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as executor:
+        return list(executor.map(load_chat, paths))
 
 
-def load_chats_from_cache(path: str) -> list[Chat]:
-    """Initialize cached chats from JSON files."""
-    path = os.path.join(path, "chats")
-    os.makedirs(path, exist_ok=True)
-    logger.info(f"Loading chats from cache at: {path}")
-    return load_chats(path)
+def import_legacy_chats(
+    path: str,
+    storage: SQLiteChatStorage,
+    cache_index: Optional[dict[str, os.DirEntry]] = None
+) -> None:
+    """Import legacy JSON chats into the chat storage.
 
+    Note:
+        Chats from JSON files in the 'chats' directory of the
+        cache are imported if the chat storage is still empty.
 
-def list_chat_ids(chats: list[Chat]) -> list[str]:
-    """Return the chat IDs.
-    
     Args:
-        chats: A list of chats.
-
-    Returns:
-        The IDs of the chats (in the same order).
+        path: The cache directory.
+        storage: The chat storage.
+        cache_index: An optional index of the cache directory (see `dir_index`).
     """
-    return list(map(lambda x: x.id, chats))
+    if cache_index is None:
+        cache_index = dir_index(path)
+    entry = cache_index.get(CACHE_CHATS_NAME)
+    if entry is not None and entry.is_dir() and not storage.list_chat_ids():
+        logger.info("Importing chats from JSON files at: %s", entry.path)
+        for chat in load_chats(entry.path):
+            storage.add_chat(chat)
 
 
-def find_chat_by_id(id: str, chats: list[Chat]) -> Optional[Chat]:
-    """Find a single chat by it's ID.
-    
+def cache_chat(chat: Chat, chats: OrderedDict[str, Chat]) -> None:
+    """Cache a chat in memory.
+
+    Note:
+        The least recently used chats are evicted if we
+        cache more than `MAX_CHATS` chats. They stay in the chat storage.
+
     Args:
-        id: A chat ID.
-        chats: A list of chats.
-    
-    Returns:
-        A matched chat or `None`.
+        chat: The chat we want to cache.
+        chats: The cached chats mapped by their IDs.
     """
-    filtered = list(filter(lambda x: x.id == id, chats))
-    if len(filtered) > 0:
-        return filtered[0]
-    return None
+    chats[chat.id] = chat
+    chats.move_to_end(chat.id)
+    while len(chats) > MAX_CHATS:
+        chats.popitem(last=False)
 
 
-def find_chat_index_by_id(id: str, chats: list[Chat]) -> int:
-    """Find the index of a chat by the chat ID.
+def find_chat_by_id(
+    id: str,
+    chats: OrderedDict[str, Chat],
+    storage: Optional[SQLiteChatStorage] = None
+) -> Optional[Chat]:
+    """Find a single chat by it's ID.
     
     Args:
         id: A chat ID.
-        chats: A list of chats.
+        chats: The cached chats mapped by their IDs.
+        storage: An optional chat storage we load the chat from if it isn't cached.
     
     Returns:
-        The value `-1` if we couldn't find a chat with the ID
-        else the index of the matched chat (in the list of chats).
+        A matched chat or `None`.
     """
-    for index, chat in enumerate(chats):
-        if chat.id == id:
-            return index
-    return -1
-
-
-def set_chat_by_id(id: str, history: ChatHistory, chats: list[Chat]) -> None:
+    chat = chats.get(id)
+    if chat is not None:
+        chats.move_to_end(id)
+        return chat
+    if storage is None:
+        return None
+    chat = storage.load_chat(id)
+    if chat is not None:
+        cache_chat(chat, chats)
+    return chat
+
+
+def set_chat_by_id(id: str, history: ChatHistory, chats: OrderedDict[str, Chat]) -> None:
     """Set an update the a chat's history.
+
+    Note:
+        The chat history is only set if the chat is marked as dirty.
     
     Args:
         id: The ID of the chat we want to update.
         history: The chat history we want to set.
-        chats: A list of chats, including the chat we want to update.
+        chats: The cached chats mapped by their IDs, including the chat we want to update.
     """
-    index = find_chat_index_by_id(id, chats)
-    if index < 0:
+    chat = chats.get(id)
+    if chat is None or not chat.dirty:
         return
-    logger.info(f"Setting existing chat with id: {id}")
+    logger.info("Setting existing chat with id: %s", id)
     chat = Chat(id=id, history=history)
-    chats[index] = chat
+    chats[id] = chat
 
 
-def update_chat_by_id(id: str, chat: Chat, chats: list[Chat]) -> None:
+def mark_chat_dirty(id: str, chats: OrderedDict[str, Chat]) -> None:
+    """Mark a cached chat as changed in the frontend.
+
+    Args:
+        id: The ID of the chat.
+        chats: The cached chats mapped by their IDs.
+    """
+    chat = chats.get(id)
+    if chat is not None:
+        chat.dirty = True
+
+
+def update_chat_by_id(id: str, chat: Chat, chats: OrderedDict[str, Chat]) -> None:
     """Update a chat.
+
+    Note:
+        The chat is mapped by its (new) ID if the ID of the chat changed.
     
     Args:
         id: The ID of the chat we want to update.
         chat: The updated chat we want to set.
-        chats: A list of chats, including the chat we want to update.
+        chats: The cached chats mapped by their IDs, including the chat we want to update.
     """
-    index = find_chat_index_by_id(id, chats)
-    if index < 0:
+    if id not in chats:
         return
-    logger.info(f"Updating existing chat with id: {id}")
-    chats[index] = chat
+    logger.info("Updating existing chat with id: %s", id)
+    del chats[id]
+    chats[chat.id] = chat
 
 
-def del_chat_by_id(id: str, chats: list[Chat]) -> None:
+def del_chat_by_id(id: str, chats: OrderedDict[str, Chat]) -> None:
     """Delete a chat.
     
     Args:
         id: The ID of the chat we want to delete.
-        chats: A list of chats, including the chat we want to delete.
+        chats: The cached chats mapped by their IDs, including the chat we want to delete.
     """
-    index = find_chat_index_by_id(id, chats)
-    if index < 0:
-        return
-    logger.info(f"Deleting chat with id: {id}")
-    del chats[index]
+    if chats.pop(id, None) is not None:
+        logger.info("Deleting chat with id: %s", id)
 
 
 def pprint_dict(dictionary: dict) -> str:
     """Return a pretty string of a dictionary."""
-    return json.dumps(
-        dictionary, 
-        ensure_ascii=False, 
-        indent=2
-    )
+    return orjson.dumps(
+        dictionary,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    ).decode("utf-8")
 
 
 def pprint_dcls(dcls: Type[dataclass]) -> str:
-    """Return a pretty string representation of a dictionary."""
-    return pprint_dict(asdict(dcls))
+    """Return a pretty string representation of a dataclass.
+
+    Note:
+        orjson serializes dataclasses natively - so we don't deep copy them with `asdict`.
+    """
+    return pprint_dict(dcls)
 
 
-def empty_chat(id: Optional[str] = None, history: ChatHistory = []) -> Chat:
+def empty_chat(id: Optional[str] = None, history: Optional[ChatHistory] = None) -> Chat:
     """Return an empty chat.
     
     Args:
         id: An optional ID for the empty chat.
-        history: The history of the chat.
+        history: The optional history of the chat.
     
     Returns:
         The initialized chat.
     """
     if id is None:
         id = haikunate()
+    if history is None:
+        history = []
     return Chat(id=id, history=history)
 
 
-def list_setting_ids(settings: list[Setting]) -> list[str]:
+def list_setting_ids(settings: dict[str, Setting]) -> list[str]:
     """Return the settings' IDs.
     
     Args:
-        settings: A list of settings.
+        settings: The settings mapped by their IDs.
 
     Returns:
         The IDs of the settings (in the same order).
     """
-    return list(map(lambda x: x.id, settings))
+    return list(settings)
 
 
-def find_setting_by_id(id: str, settings: list[Setting]) -> Optional[Setting]:
+def find_setting_by_id(id: str, settings: dict[str, Setting]) -> Optional[Setting]:
     """Find a single setting by it's ID.
     
     Args:
         id: A setting ID.
-        chats: A list of settings.
+        settings: The settings mapped by their IDs.
     
     Returns:
         A matched setting or `None`.
     """
-    filtered = list(filter(lambda x: x.id == id, settings))
-    if len(filtered) > 0:
-        return filtered[0]
-    return None
\ No newline at end of file
+    return settings.get(id)
\ No newline at end of file
@@ -12,15 +12,17 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Any, Generator
+from typing import Any, AsyncGenerator, Generator, TypedDict
 
 import os
 from dataclasses import dataclass
 
-import openai
 
+# The OpenAI API-Key of the 'OPENAI_API_KEY' environment variable (once it was read)
+_resolved_api_key: str | None = None
 
-@dataclass
+
+@dataclass(slots=True)
 class OpenAiChatCompletionChunkChoiceDelta:
     """A OpenAI chat completion chunk choice delta object.
 
@@ -31,7 +33,7 @@ class OpenAiChatCompletionChunkChoiceDelta:
     content: str | None = None
     role: str | None = None
 
-@dataclass
+@dataclass(slots=True)
 class OpenAiChatCompletionChunkChoice:
     """A OpenAI chat completion chunk choice object.
 
@@ -50,7 +52,7 @@ class OpenAiChatCompletionChunkChoice:
             self.delta = OpenAiChatCompletionChunkChoiceDelta(**self.delta)
 
 
-@dataclass
+@dataclass(slots=True)
 class OpenAiChatCompletionChunk:
     """A OpenAI chat completion chunk object.
 
@@ -79,6 +81,100 @@ class OpenAiChatCompletionChunk:
 
 
 
+class OpenAiChatCompletionChunkChoiceDeltaDict(TypedDict, total=False):
+    """A raw OpenAI chat completion chunk choice delta (see `OpenAiChatCompletionChunkChoiceDelta`)."""
+    content: str | None
+    role: str | None
+
+
+class OpenAiChatCompletionChunkChoiceDict(TypedDict):
+    """A raw OpenAI chat completion chunk choice (see `OpenAiChatCompletionChunkChoice`)."""
+    index: int
+    delta: OpenAiChatCompletionChunkChoiceDeltaDict
+    finish_reason: str | None
+
+
+class OpenAiChatCompletionChunkDict(TypedDict):
+    """A raw OpenAI chat completion chunk (see `OpenAiChatCompletionChunk`).
+
+    Note:
+        This only types the dictionary - so reading a streamed chunk costs no object construction.
+    """
+    id: str
+    object: str
+    created: int
+    model: str
+    choices: list[OpenAiChatCompletionChunkChoiceDict]
+
+
+def chunk_output(chunk: OpenAiChatCompletionChunkDict) -> str | None:
+    """Return the output of a raw chat completion chunk.
+
+    Note:
+        This reads the content directly from the chunk dictionary. We only cast
+        chunks to `OpenAiChatCompletionChunk` objects if they are returned.
+
+    Args:
+        chunk: A chat completion chunk from the OpenAI chat completion API.
+
+    Returns:
+        The content of the chunk's first choice delta (if there is any).
+    """
+    choices = chunk["choices"]
+    if not choices:
+        return None
+    delta = choices[0].get("delta") or {}
+    return delta.get("content")
+
+
+def chat_completion_kwargs(
+    messages: list[dict],
+    model: str,
+    functions: list[dict] | None,
+    function_call: str | None,
+    user: str | None,
+    openai_api_key: str | None,
+    **kwargs
+) -> dict[str, Any]:
+    """Return the keyword arguments of a streamed OpenAI chat completion request.
+
+    Note:
+        See `openai_chat_completion` for a description of the arguments.
+
+    Returns:
+        The keyword arguments without `None` values of the optional arguments.
+
+    Raises:
+        ValueError: No OpenAI API-Key was provided.
+    """
+    global _resolved_api_key
+    if not openai_api_key:
+        if _resolved_api_key is None:
+            _resolved_api_key = os.getenv("OPENAI_API_KEY") or None
+        openai_api_key = _resolved_api_key
+    if openai_api_key is None:
+        raise ValueError(
+            "An OpenAI API-Key has to be provided in order to use the OpenAI chat completion endpoint!"
+        )
+
+    # Pass the OpenAI API-Key per request - so we don't mutate the global `openai.api_key` of concurrent requests
+    kwargs = {
+        **kwargs,
+        "model": model,
+        "messages": messages,
+        "stream": True,
+        "api_key": openai_api_key
+    }
+    # Only set the optional arguments if they are provided - We don't send `None` values to the chat completion endpoint
+    if functions is not None:
+        kwargs["functions"] = functions
+    if function_call is not None:
+        kwargs["function_call"] = function_call
+    if user is not None:
+        kwargs["user"] = user
+    return kwargs
+
+
 def openai_chat_completion(
     messages: list[dict],
     model: str = "gpt-3.5-turbo-0613",
@@ -112,33 +208,65 @@ def openai_chat_completion(
     Raises:
         ValueError: No OpenAI API-Key was provided.
     """
-    openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
-    if openai_api_key is None:
-        raise ValueError(
-            "An OpenAI API-Key has to be provided in order to use the OpenAI chat completion endpoint!"
-        )
-    else:
-        # Set the OpenAI API-Key manually
-        openai.api_key = openai_api_key
-
-    kwargs = dict(
-        **kwargs,
-        model=model,
-        messages=messages,
-        functions=functions,
-        function_call=function_call,
-        user=user,
-        stream=True
+    kwargs = chat_completion_kwargs(
+        messages,
+        model,
+        functions,
+        function_call,
+        user,
+        openai_api_key,
+        **kwargs
     )
-    # Filter out `None` key-value-pairs - We don't send them to the chat completion endpoint
-    kwargs = {k: v for k, v in kwargs.items() if v is not None}
-
+    # Import the OpenAI SDK on first use - so we don't pay its import time at startup
+    import openai
     completion = openai.ChatCompletion.create(**kwargs)
 
     for chunk in completion:
-        chunk = OpenAiChatCompletionChunk(**chunk)
-        output = chunk.get_output()
+        output = chunk_output(chunk)
+        if return_chat_completion:
+            yield output, OpenAiChatCompletionChunk(**chunk)
+        else:
+            yield output
+
+
+async def openai_chat_completion_async(
+    messages: list[dict],
+    model: str = "gpt-3.5-turbo-0613",
+    functions: list[dict] | None = None,
+    function_call: str | None = None,
+    user: str | None = None,
+    return_chat_completion: bool = False, 
+    openai_api_key: str | None = None, 
+    **kwargs
+) -> AsyncGenerator[str | tuple[str, OpenAiChatCompletionChunk], None]:
+    """Generate a OpenAI chat completion without blocking the event loop.
+
+    Note:
+        This is the asynchronous version of `openai_chat_completion`.
+        See `openai_chat_completion` for a description of the arguments.
+
+    Returns:
+        An async generator that returns the output chunks or tuples of output chunks and chunk objects.
+
+    Raises:
+        ValueError: No OpenAI API-Key was provided.
+    """
+    kwargs = chat_completion_kwargs(
+        messages,
+        model,
+        functions,
+        function_call,
+        user,
+        openai_api_key,
+        **kwargs
+    )
+    # Import the OpenAI SDK on first use - so we don't pay its import time at startup
+    import openai
+    completion = await openai.ChatCompletion.acreate(**kwargs)
+
+    async for chunk in completion:
+        output = chunk_output(chunk)
         if return_chat_completion:
-            yield output, chunk
+            yield output, OpenAiChatCompletionChunk(**chunk)
         else:
-            yield output
\ No newline at end of file
+            yield output
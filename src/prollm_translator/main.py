@@ -15,8 +15,8 @@
 import os
 import json
 import logging
-from prollm.parser import argument_parser
-from prollm.utils import timestamp
+from prollm_translator.parser import argument_parser
+from prollm_translator.utils import timestamp, LazyStr
 
 
 logger = logging.getLogger(__name__)
@@ -44,18 +44,18 @@ def main() -> None:
     )
 
     logger = logging.getLogger(__name__)
-    logger.info(f"Writing logs to file: {logs_filename}")
+    logger.info("Writing logs to file: %s", logs_filename)
 
     # Print the current config
-    config = json.dumps(vars(args), indent=2)
-    logger.info(f"Starting prollm with config:\n{config}")
+    config = LazyStr(json.dumps, vars(args), indent=2)
+    logger.info("Starting prollm with config:\n%s", config)
 
     if args.local:
         # Set up the local environment
         from dotenv import load_dotenv
         if load_dotenv(args.env_file, verbose=True):
             logger.info(
-                f"Loaded local environment variables with dotenv from: {args.env_file}"
+                "Loaded local environment variables with dotenv from: %s", args.env_file
             )
 
 
@@ -16,7 +16,7 @@ import os
 import argparse
 
 
-def local_path(path: str) -> str | None:
+def local_path(path: str) -> str:
     """Typing for provided path arguments.
 
     Args:
@@ -26,20 +26,20 @@ def local_path(path: str) -> str | None:
         The path if it exists.
 
     Raises:
-        ArgumentTypeError: The provided path doesn't exist.
+        ArgumentTypeError: The provided path doesn't exist or can't be accessed.
     """
-    if os.path.exists(path):
-        return path
-    else:
+    # Stat the path directly - so we can tell missing paths from inaccessible ones
+    try:
+        os.stat(path)
+    except FileNotFoundError:
         raise argparse.ArgumentTypeError(f"The provided '{path=}' doesn't exist!")
+    except OSError as e:
+        raise argparse.ArgumentTypeError(f"The provided '{path=}' can't be accessed: {e}")
+    return path
 
 
-def argument_parser() -> argparse.ArgumentParser:
-    """Return an argument parser.
-
-    Returns:
-        An argument parser.
-    """
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of the translator."""
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "--local",
@@ -60,3 +60,16 @@ def argument_parser() -> argparse.ArgumentParser:
         help="The path to the logging directory.",
     )
     return parser
+
+
+# The parser is built once and reused
+_PARSER = _build_parser()
+
+
+def argument_parser() -> argparse.ArgumentParser:
+    """Return an argument parser.
+
+    Returns:
+        An argument parser.
+    """
+    return _PARSER
@@ -12,114 +12,86 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from prollm_translator import utils
-
-
-PROMPT = """You are the world's best translator (ever). Detailed instructions on your task will follow in a markdown format below.
-
-# About You
-
-Learn about your beautiful personality, greatest strengths and highest priorities.
-
-## Your Background
-
-You are the world's best translator (ever). As a world renound genius you are known for beeing able to translate any text into any other language.
-From your decades of experience you also aquired unique knowledge of cultures all around the world.
-As a translator your work is known and praised for theese traits:
-- Preservation of text structure
-- Faithful and natural translations
-- Bridging cultures by preserving human connections
-
-## Your Job Description
-
-Your main job is to translate text from **{source_lang_long}** to **{target_lang_long}**. As the world's best translator
-you are extremely knowledgeable when to translate accuratelly or faithfully. Your highest priority is to translate the message/intent/meaning of the text.
-The exact words aren't your too important as you want to want to achieve a natural human intercultural communication.
-
-# Your Workspace
-
-Do your great job in this workspace.
-
-## Description of Your Workspace
+from typing import Callable
 
-### Your Work Routine (w/ detailed steps)
+import re
+import pathlib
+import textwrap
+import functools
 
-As translator you will recieve user requests in {source_lang_long}. Users may just say the text they whish to be translated.
-Other situations may include:
-- Users requesting a certain style (e.g. polite, colloquial, ...)
-- Users requesting a specific format (e.g. sentence, mail, letter, ...)
-From experience you an immediately identify theese and other details and a user's wish in the translation.
-
-After throroughly analyzing user's request you provide a brief background on cultural informations pertaining to the languages/countries/cultures of importance.
-This includes a very short analysis of the language details in the {source_lang_long} source text. Keeping this analysis in mind, you briefly explain how you preserve the analyzed linguistic features in the {target_lang_long} translation.
-You can include an intercultural analysis on how to faithfully preserve the natural human interaction.
-
-Here is a summary of the steps of your work routine:
-1. Analyze and interpret the user's request
-    1. Identify text you have to translate
-    2. Collect information on how and what to output based on the user's request (style, format, ...)
-2. Analyze the text you want to interpret for meaning and linguistic features
-3. Conclude the former analysis with explanations on how do an excellent faithful translation in the intercultural context
-4. Write the translation
-
-### Summary of Your Job (as bullet points)
-
-- Create the world's best translation
-- Translate text from **{source_lang_long}** to **{target_lang_long}**
-- Preserve the message/intent/meaning of the text in the translation
-- Faithfully represent the intercultural human connection
-
-### Your Tools
-
-You may be the world's best translator - but not by coincidence. You also know how to use the tools at hand.
-
-One of your great tools is a machine-translator. This uses the latest innovative AI to generate a translation.
-
-Your tools serve as guides in the translation process. But you won't be fooled by them and always make up your own mind.
-
-## Template of your Workspace
+from prollm_translator import utils
 
-Always respond based on the following template:
-```
-# Translation Source and Target Language
 
-Translate from: {source_lang_long}
-Translate into: {target_lang_long}
+# The languages we parse at import - so their first lookup isn't paid by a request
+SUPPORTED_LANGUAGES = ("en", "de", "fr", "es", "it", "pt", "nl", "pl", "ja", "zh")
 
-# Tool Outputs
+# The prompt is loaded from text files next to this module
+_PROMPTS_DIR = pathlib.Path(__file__).parent
 
-Google Translator: {google_translation}
+# The static part of the prompt - so LLM servers can reuse a cached prefix between requests
+PROMPT_PREFIX = (_PROMPTS_DIR / "base_prompt.prefix.txt").read_text(encoding="utf-8")
 
-# Translation Source Text
+# The dynamic part of the prompt with the only fields of the template
+PROMPT_SUFFIX = (_PROMPTS_DIR / "base_prompt.suffix.txt").read_text(encoding="utf-8")
 
-The text that shall be translated (extracted from the user's latest request). 
-Note: This section has to a copy of the text you have to translate!
+# Normalize the whitespace of the files once - so we don't send it with every request
+PROMPT_PREFIX = textwrap.dedent(PROMPT_PREFIX).strip() + "\n"
+PROMPT_SUFFIX = "\n" + textwrap.dedent(PROMPT_SUFFIX).strip()
 
-# Translation Style and Formatting
- 
-The user's requested style and format of the translation. Keep this analysis below 50 words!
+PROMPT = PROMPT_PREFIX + PROMPT_SUFFIX
 
-# Source Text Linguistic Features
+_FIELDS_PATTERN = re.compile(r"\{(source_lang_long|target_lang_long|google_translation)\}")
+_GOOGLE_TRANSLATION_FIELD = "{google_translation}"
 
-A brief analysis and interpretation of the linguistic features of the source text. You never use more than 100 words for this!
+# The prefix is sent as is - so it can't have any fields
+if _FIELDS_PATTERN.search(PROMPT_PREFIX):
+    raise ValueError(
+        "The prompt prefix 'base_prompt.prefix.txt' can't have fields! Move them into the prompt suffix."
+    )
 
-# Conclusion of Measures to Ensure Translation Quality
+# The suffix split into literal parts and field names (at every odd index)
+# - so we don't parse the template with `str.format` on every call
+_PARTS = _FIELDS_PATTERN.split(PROMPT_SUFFIX)
+_SLOTS = range(1, len(_PARTS), 2)
 
-Your final conclusion on how to create the best faithful translation in less than 100 words. 
-Note: This is the moment where all of your experience and knowledge of the intercultural background shines.
 
-# Final Translation
+@functools.lru_cache(maxsize=256)
+def _partial(source_lang_short: str, target_lang_short: str) -> tuple[str, ...]:
+    """Return the prompt of a language pair split at the Google translation fields.
 
-```
-"""
+    Note:
+        The language names are filled once per language pair - so a request
+        only has to insert its Google translation (see `prompt`).
 
+    Args:
+        source_lang_short: The ISO 639-1 language name of text the we want to translate.
+        target_lang_short: The ISO 639-1 language name of text the we want to translate into.
 
+    Returns:
+        The parts of the prompt between the Google translation fields (if there are any).
+    """
+    fields = {
+        "source_lang_long": utils.parse_iso639_name(source_lang_short),
+        "target_lang_long": utils.parse_iso639_name(target_lang_short)
+    }
+    parts = _PARTS.copy()
+    for i in _SLOTS:
+        parts[i] = fields.get(parts[i], _GOOGLE_TRANSLATION_FIELD)
+    return tuple((PROMPT_PREFIX + "".join(parts)).split(_GOOGLE_TRANSLATION_FIELD))
+
+
+# Cache the prompts of recurring requests (e.g. retries) - the requests are bounded by the cache size
+@functools.lru_cache(maxsize=1024)
 def prompt(
     source_lang_short: str,
     target_lang_short: str,
     google_translation: str
 ) -> str:
     """Base prompt for a translator.
+
+    Note:
+        The prompt starts with the static `PROMPT_PREFIX`. Only the `PROMPT_SUFFIX` is filled.
+        The language pair is filled once (see `_partial`) - so we only insert the Google translation.
     
     Args:
         source_lang_short: The ISO 639-1 language name of text the we want to translate.
@@ -128,14 +100,44 @@ def prompt(
     Returns:
         The base prompt for a translator.
     """
-    source_lang_iso639 = utils.parse_iso639(source_lang_short)
-    target_lang_iso639 = utils.parse_iso639(target_lang_short)
-    source_lang_long = source_lang_iso639.name
-    target_lang_long = target_lang_iso639.name
-
-    output = PROMPT.format(
-        source_lang_long=source_lang_long,
-        target_lang_long=target_lang_long,
-        google_translation=google_translation
-    )
-    return output
\ No newline at end of file
+    return google_translation.join(_partial(source_lang_short, target_lang_short))
+
+
+@functools.lru_cache(maxsize=8)
+def _prefix_ids(encode: Callable[[str], list[int]]) -> tuple[int, ...]:
+    """Return the (cached) token IDs of the static `PROMPT_PREFIX`."""
+    return tuple(encode(PROMPT_PREFIX))
+
+
+def prompt_ids(
+    source_lang_short: str,
+    target_lang_short: str,
+    google_translation: str,
+    encode: Callable[[str], list[int]]
+) -> list[int]:
+    """Token IDs of the base prompt for a translator.
+
+    Note:
+        The static `PROMPT_PREFIX` is encoded once per `encode` function - so we only
+        encode the filled `PROMPT_SUFFIX` per call. The prefix and suffix are encoded
+        separately. This may differ from encoding the whole prompt at their boundary.
+
+    Args:
+        source_lang_short: The ISO 639-1 language name of text the we want to translate.
+        target_lang_short: The ISO 639-1 language name of text the we want to translate into.
+        google_translation: The translation of the Google translator.
+        encode: A (hashable) function that encodes text into token IDs
+            (e.g. the `encode` method of a tokenizer).
+
+    Returns:
+        The token IDs of the base prompt for a translator.
+    """
+    output = google_translation.join(_partial(source_lang_short, target_lang_short))
+    suffix = output[len(PROMPT_PREFIX):]
+    return [*_prefix_ids(encode), *encode(suffix)]
+
+
+# Warm up the language name cache of `utils.parse_iso639_name`
+for _lang in SUPPORTED_LANGUAGES:
+    utils.parse_iso639_name(_lang)
+del _lang
@@ -12,17 +12,69 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import datetime
+from typing import Any, Callable
+
+import time
+import functools
+from datetime import datetime
+
 import iso639
 
 
-def timestamp() -> str:
-    """Return a current timestamp."""
-    return datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+def timestamp_ns() -> int:
+    """Return a current timestamp in nanoseconds since the epoch.
+
+    Note:
+        Use this to order or identify events. Format it with `timestamp` only
+        if a readable representation is needed (e.g. in file names).
+    """
+    return time.time_ns()
+
+
+def timestamp(ns: int | None = None) -> str:
+    """Return a timestamp (formatted as '%Y%m%d%H%M%S').
+
+    Args:
+        ns: An optional timestamp (see `timestamp_ns`). Defaults to the current time.
+
+    Returns:
+        The formatted timestamp in local time.
+    """
+    if ns is None:
+        ns = timestamp_ns()
+    # Format the fields directly - so we skip the format parsing of `strftime`
+    now = datetime.fromtimestamp(ns // 1_000_000_000)
+    return f"{now.year:04d}{now.month:02d}{now.day:02d}{now.hour:02d}{now.minute:02d}{now.second:02d}"
+
+
+class LazyStr:
+    """A lazy string representation of a function result.
+
+    Note:
+        This defers expensive formatting (e.g. for log messages)
+        until the string representation is actually used.
+
+    Args:
+        fn: A function that returns a string.
+        args: The arguments of the function.
+        kwargs: The keyword arguments of the function.
+    """
+    def __init__(self, fn: Callable[..., str], *args: Any, **kwargs: Any) -> None:
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
 
+    def __str__(self) -> str:
+        return self.fn(*self.args, **self.kwargs)
 
+
+@functools.lru_cache(maxsize=512)
 def parse_iso639(lang: str) -> iso639.Language:
     """Parse a ISO 639-1 string.
+
+    Note:
+        The parsed languages are cached. `iso639.Language` objects are immutable
+        - so we can share them between callers.
     
     Args:
         lang: The language string.
@@ -34,3 +86,19 @@ def parse_iso639(lang: str) -> iso639.Language:
         iso639.LanguageNotFoundError: The string is not compliant with ISO 639-1.
     """
     return iso639.Language.match(lang)
+
+
+@functools.lru_cache(maxsize=512)
+def parse_iso639_name(lang: str) -> str:
+    """Parse the (cached) name of a ISO 639-1 string.
+
+    Args:
+        lang: The language string.
+
+    Returns:
+        The name of the language (e.g. 'English' for 'en').
+
+    Raises:
+        iso639.LanguageNotFoundError: The string is not compliant with ISO 639-1.
+    """
+    return parse_iso639(lang).name